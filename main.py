@@ -1,24 +1,52 @@
 # coding: utf-8
 
 import argparse
-import itertools
+import functools
 import json
+import logging
+import mmap
+import os
 import re
-from dataclasses import dataclass
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from enum import Enum
+from pathlib import Path
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 _API_ORIGIN = 'https://api.trello.com'
+_SETTINGS_JSON_FILE = 'settings.json'
 _MOCK_BOARDS_FILE = 'mock_boards.json'
 _MOCK_ACTIONS_FILE = 'mock_actions.json'
 _MOCK_CARDS_FILE = 'mock_cards.json'
 _UTC = timezone(timedelta(), 'UTC')
 _JST = timezone(timedelta(hours=9), name='JST')
-_PLUS_FOR_TRELLO_COMMENT_FORMAT = r'^plus\! (\d+(\.\d+)?)/(\d+(\.\d+)?) ?(.*)$'
+_PLUS_FOR_TRELLO_COMMENT_PREFIX = 'plus! '
+_PLUS_FOR_TRELLO_COMMENT_PATTERN = re.compile(
+    r'^plus\! (\d+(\.\d+)?)/(\d+(\.\d+)?) ?(.*)$')
 _REPORT_MARKDOWN_FILE = 'report.md'
 _REPORT_JSON_FILE = 'mock_report.json'
+# (connect, read)
+_REQUEST_TIMEOUT_SECONDS = (3.05, 30)
+
+_LOGGER = logging.getLogger(__name__)
+
+_IO_EXECUTOR = ThreadPoolExecutor(max_workers=2)
+
+_SESSION = requests.Session()
+# Adds br to gzip/deflate when the brotli package is installed
+_SESSION.headers.update(make_headers(accept_encoding=True))
+_SESSION.mount(
+    'https://', HTTPAdapter(pool_connections=4, pool_maxsize=10))
 
 
 class Mode(Enum):
@@ -28,71 +56,83 @@ class Mode(Enum):
     GET_REPORT = 'report'
 
 
-@dataclass
+# Each mode maps to its start message and a runner that reads only the
+# settings it needs
+_MODES = {
+    Mode.GET_BOARDS: (
+        'Run in get boards mode',
+        lambda settings, mock: get_boards(
+            user_id=settings['trelloUserName'])),
+    Mode.GET_ACTIONS: (
+        'Run in get actions mode',
+        lambda settings, mock: get_actions(
+            start_datetime=get_start_datetime(mock),
+            board_id=settings['trelloBoardId'],
+            mock=mock)),
+    Mode.GET_CARDS: (
+        'Run in get cards mode',
+        lambda settings, mock: get_cards(
+            board_id=settings['trelloBoardId'],
+            mock=mock)),
+    Mode.GET_REPORT: (
+        'Run in default mode (get report mode)',
+        lambda settings, mock: run_report(
+            board_id=settings['trelloBoardId'],
+            projects=settings['projects'],
+            categories=settings['categories'],
+            mock=mock)),
+}
+
+
+@dataclass(frozen=True, slots=True)
 class Label:
     id: str
-    text: str
-
-    def __eq__(self, other):
-        if not isinstance(other, Label):
-            return False
-        return self.id == other.id
+    text: str = field(compare=False)
 
-    def __hash__(self):
-        return hash(self.id)
 
-
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Card:
     id: str
-    title: str
-    labels: [Label]
-
-    def __eq__(self, other):
-        if not isinstance(other, Card):
-            return False
-        return self.id == other.id
-
-    def __hash__(self):
-        return hash(self.id)
+    title: str = field(compare=False)
+    labels: frozenset = field(compare=False)
 
 
-@dataclass
+@dataclass(slots=True)
 class Action:
     card_id: str
     comment: str
     spent: float
 
 
-@dataclass
+@dataclass(slots=True)
 class Spent:
     card_id: str
     comments: [str]
     spent: float
 
 
-@dataclass
+@dataclass(slots=True)
 class TaskReport:
     title: str
     spent: float
     sub_tasks: [str]
 
 
-@dataclass
+@dataclass(slots=True)
 class CategoryReport:
     title: str
     spent: float
     tasks: [TaskReport]
 
 
-@dataclass
+@dataclass(slots=True)
 class ProjectReport:
     title: str
     spent: float
     categories: [CategoryReport]
 
 
-@dataclass
+@dataclass(slots=True)
 class DailyReport:
     title: str
     spent: float
@@ -103,80 +143,69 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--mode', type=str, default=Mode.GET_REPORT.value)
     parser.add_argument('--prod', action='store_true', default=False)
+    parser.add_argument('--verbose', action='store_true', default=False)
     arguments = parser.parse_args()
 
-    mode_str = arguments.mode
-    if mode_str == Mode.GET_BOARDS.value:
-        mode = Mode.GET_BOARDS
-        print('Run in get boards mode')
-    elif mode_str == Mode.GET_ACTIONS.value:
-        mode = Mode.GET_ACTIONS
-        print('Run in get actions mode')
-    elif mode_str == Mode.GET_CARDS.value:
-        mode = Mode.GET_CARDS
-        print('Run in get cards mode')
-    elif mode_str == Mode.GET_REPORT.value:
-        mode = Mode.GET_REPORT
-        print('Run in default mode (get report mode)')
-    else:
-        raise Exception('Invalid mode')
+    logging.basicConfig(
+        format='%(message)s',
+        level=logging.DEBUG if arguments.verbose else logging.INFO)
+
+    try:
+        message, run_mode = _MODES[Mode(arguments.mode)]
+    except ValueError:
+        raise SystemExit('Invalid mode')
+    _LOGGER.info(message)
 
     mock = not arguments.prod
     if mock:
-        print('Run in mock mode')
+        _LOGGER.info('Run in mock mode')
     else:
-        print('Run in production mode')
-
-    SETTINGS_JSON_FILE_NAME = 'settings.json'
-    with open(SETTINGS_JSON_FILE_NAME, 'r', encoding='utf-8') as f:
-        settings_dict = json.load(f)
-
-    trello_api_key = settings_dict['trelloApiKey']
-    trello_api_secret = settings_dict['trelloApiSecret']
-    trello_user_name = settings_dict['trelloUserName']
-    trello_board_id = settings_dict['trelloBoardId']
-    projects = settings_dict['projects']
-    categories = settings_dict['categories']
-
-    general_params = {
-        'key': trello_api_key,
-        'token': trello_api_secret,
-    }
+        _LOGGER.info('Run in production mode')
 
-    if mode == Mode.GET_BOARDS:
-        get_boards(user_id=trello_user_name, general_params=general_params)
+    settings_dict = load_settings(
+        path=_SETTINGS_JSON_FILE,
+        mtime=os.path.getmtime(_SETTINGS_JSON_FILE))
 
-    elif mode == Mode.GET_ACTIONS:
-        start_datetime = get_start_datetime(mock)
-        get_actions(
-            start_datetime=start_datetime,
-            board_id=trello_board_id,
-            general_params=general_params,
-            mock=mock)
+    _SESSION.params.update({
+        'key': settings_dict['trelloApiKey'],
+        'token': settings_dict['trelloApiSecret'],
+    })
 
-    elif mode == Mode.GET_CARDS:
-        get_cards(
-            board_id=trello_board_id,
-            general_params=general_params,
-            mock=mock)
+    try:
+        run_mode(settings_dict, mock)
+    finally:
+        _IO_EXECUTOR.shutdown(wait=True)
 
-    elif mode == Mode.GET_REPORT:
-        start_datetime = get_start_datetime(mock)
-        spents = get_actions(
+
+def run_report(
+        board_id: str,
+        projects: [str],
+        categories: [str],
+        mock: bool):
+    start_datetime = get_start_datetime(mock)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        spents_future = executor.submit(
+            get_actions,
             start_datetime=start_datetime,
-            board_id=trello_board_id,
-            general_params=general_params,
-            mock=mock)
-        cards = get_cards(
-            board_id=trello_board_id,
-            general_params=general_params,
+            board_id=board_id,
             mock=mock)
-        get_report(
-            start_datetime=start_datetime,
-            spents=spents,
-            cards=cards,
-            projects=projects,
-            categories=categories)
+        cards_future = executor.submit(
+            get_cards, board_id=board_id, mock=mock)
+        spents = spents_future.result()
+        cards = cards_future.result()
+    get_report(
+        start_datetime=start_datetime,
+        spents=spents,
+        cards=cards,
+        projects=projects,
+        categories=categories)
+
+
+@functools.lru_cache(maxsize=1)
+def load_settings(path: str, mtime: float) -> dict:
+    # mtime is part of the cache key so an edited file is read again
+    with open(path, 'rb') as f:
+        return load_json(f.read())
 
 
 def get_start_datetime(mock: bool) -> datetime:
@@ -187,55 +216,39 @@ def get_start_datetime(mock: bool) -> datetime:
         return current.replace(hour=0, minute=0, second=0, microsecond=0)
 
 
-def get_boards(user_id: str, general_params: dict):
+def get_boards(user_id: str):
     get_boards_path = f'/1/members/{user_id}/boards'
-    query = get_query(params=general_params)
-    url = f'{_API_ORIGIN}{get_boards_path}?{query}'
-
-    print(f'Get url: {url}')
-
-    result = requests.get(url)
-    boards_string = result.text
-
-    print(f'result: {boards_string}')
+    url = f'{_API_ORIGIN}{get_boards_path}'
+    params = {
+        'filter': 'open',
+        'fields': 'name,url',
+        'lists': 'open',
+        'list_fields': 'name',
+    }
 
-    boards = json.loads(boards_string)
-    with open(_MOCK_BOARDS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(boards, f, ensure_ascii=False, indent=4)
+    fetch_content(url=url, params=params, cache_file=_MOCK_BOARDS_FILE)
 
 
 def get_actions(
         start_datetime: datetime,
         board_id: str,
-        general_params: dict,
         mock: bool) -> [Spent]:
     if mock:
-        with open(_MOCK_ACTIONS_FILE, 'r', encoding='utf-8') as f:
-            actions = json.load(f)
+        actions = read_json(_MOCK_ACTIONS_FILE)
     else:
         actions = fetch_actions(
-            board_id=board_id,
-            general_params=general_params)
-
-        with open(_MOCK_ACTIONS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(actions, f, ensure_ascii=False, indent=4)
+            board_id=board_id, start_datetime=start_datetime)
 
     actions = parse_actions(actions=actions, start_datetime=start_datetime)
 
     return actions
 
 
-def get_cards(board_id: str, general_params: dict, mock: bool) -> [Card]:
+def get_cards(board_id: str, mock: bool) -> [Card]:
     if mock:
-        with open(_MOCK_CARDS_FILE, 'r', encoding='utf-8') as f:
-            cards = json.load(f)
+        cards = read_json(_MOCK_CARDS_FILE)
     else:
-        cards = fetch_cards(
-            board_id=board_id,
-            general_params=general_params)
-
-        with open(_MOCK_CARDS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(cards, f, ensure_ascii=False, indent=4)
+        cards = fetch_cards(board_id=board_id)
 
     cards = parse_cards(cards=cards)
     return cards
@@ -252,38 +265,42 @@ def get_report(
         cards[card_id]
         for card_id in spent_card_ids
         if card_id in cards.keys()]
-    print(f'Spent cards: {spent_cards}')
+    _LOGGER.debug('Spent cards: %s', spent_cards)
 
-    target_labels = set(
-        list(itertools.chain.from_iterable(
-            [card.labels for card in spent_cards])))
+    target_labels = frozenset().union(
+        *[card.labels for card in spent_cards])
     target_label_texts = [label.text for label in target_labels]
-    print(f'Target labels: {target_labels}')
+    _LOGGER.debug('Target labels: %s', target_labels)
 
     target_projects = [
         label for label in target_labels if label.text in projects]
-    print(f'Target projects: {target_projects}')
+    _LOGGER.debug('Target projects: %s', target_projects)
 
     target_categories = [
         label for label in target_labels if label.text in categories]
-    print(f'Target categories: {target_categories}')
+    _LOGGER.debug('Target categories: %s', target_categories)
+
+    card_ids_by_label_id = defaultdict(set)
+    for card in cards.values():
+        for label in card.labels:
+            card_ids_by_label_id[label.id].add(card.id)
 
     project_reports = []
     added_card_ids = set()
 
     for project in target_projects:
-        project_card_id_set = [
-            card.id for card in cards.values() if project in card.labels]
-        added_card_ids = added_card_ids.union(project_card_id_set)
+        project_card_ids = card_ids_by_label_id[project.id]
+        added_card_ids |= project_card_ids
 
         project_spents = [
-            spent for spent in spents if spent.card_id in project_card_id_set]
+            spent for spent in spents if spent.card_id in project_card_ids]
 
         project_report = get_project_report(
             project=project.text,
             spents=project_spents,
             categories=target_categories,
-            cards=cards)
+            cards=cards,
+            card_ids_by_label_id=card_ids_by_label_id)
 
         project_reports.append(project_report)
 
@@ -296,7 +313,8 @@ def get_report(
             project='その他',
             spents=not_project_spents,
             categories=target_categories,
-            cards=cards)
+            cards=cards,
+            card_ids_by_label_id=card_ids_by_label_id)
 
         project_reports.append(project_report)
 
@@ -312,62 +330,146 @@ def get_report(
     print('====================')
     print(markdown)
 
-    with open(_REPORT_MARKDOWN_FILE, 'w', encoding='utf=8')as f:
-        f.write(markdown)
+    Path(_REPORT_MARKDOWN_FILE).write_bytes(markdown.encode('utf-8'))
 
     report_dict = get_dict(report=report)
-    with open(_REPORT_JSON_FILE, 'w', encoding='utf-8') as f:
-        json.dump(report_dict, f, ensure_ascii=False, indent=2)
+    Path(_REPORT_JSON_FILE).write_bytes(dump_json(report_dict))
 
 
-def fetch_actions(board_id: str, general_params: dict) -> [dict]:
+def fetch_actions(board_id: str, start_datetime: datetime) -> [dict]:
     get_actions_path = f'/1/boards/{board_id}/actions'
 
-    params = general_params.copy()
-    params['limit'] = 100
     filter_params = [
         'commentCard',
     ]
-    params['filter'] = ','.join(filter_params)
+    params = {
+        'limit': 1000,
+        'since': start_datetime.astimezone(_UTC).isoformat(),
+        'filter': ','.join(filter_params),
+    }
 
-    query = get_query(params=params)
+    url = f'{_API_ORIGIN}{get_actions_path}'
 
-    url = f'{_API_ORIGIN}{get_actions_path}?{query}'
+    content = fetch_content(
+        url=url, params=params, cache_file=_MOCK_ACTIONS_FILE)
+    actions = load_json(content)
+    return actions
 
-    print(f'Get url: {url}')
 
-    result = requests.get(url)
-    actions_string = result.text
+def fetch_content(url: str, params: dict, cache_file: str) -> bytes:
+    # The response is saved to cache_file along with its ETag, so an
+    # unchanged resource is answered with 304 and read back from disk
+    etag_file = f'{cache_file}.etag'
+    headers = {}
+    if os.path.exists(cache_file) and os.path.exists(etag_file):
+        headers['If-None-Match'] = Path(etag_file).read_text(encoding='utf-8')
 
-    print(f'result: {actions_string}')
+    _LOGGER.debug('Get url: %s', url)
 
-    actions = json.loads(actions_string)
-    return actions
+    result = _SESSION.get(
+        url,
+        params=params,
+        headers=headers,
+        timeout=_REQUEST_TIMEOUT_SECONDS)
 
+    # A 304 only means the capture is current if we asked conditionally
+    if ('If-None-Match' in headers
+            and result.status_code == requests.codes.not_modified):
+        _LOGGER.debug('Not modified, reuse %s', cache_file)
+        return Path(cache_file).read_bytes()
 
-def get_query(params: dict) -> str:
-    query_strings = [f'{key}={value}' for key, value in params.items()]
-    query = '&'.join(query_strings)
-    return query
+    # Never cache an error body, it would be served back on a later 304
+    result.raise_for_status()
+    if result.status_code != requests.codes.ok:
+        raise requests.HTTPError(
+            f'Unexpected status {result.status_code} for url: {result.url}',
+            response=result)
 
+    content = result.content
+    _IO_EXECUTOR.submit(
+        write_capture,
+        cache_file=cache_file,
+        content=content,
+        etag=result.headers.get('ETag'))
+
+    return content
+
+
+def write_capture(cache_file: str, content: bytes, etag: str):
+    # Runs on _IO_EXECUTOR so the caller can parse the response meanwhile
+    etag_file = f'{cache_file}.etag'
+    try:
+        # Drop the ETag first so a half-written capture is never treated
+        # as current by a later 304
+        Path(etag_file).unlink(missing_ok=True)
+
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            # Only pretty-print the capture when debugging, otherwise the
+            # body is saved as received without a decode/encode round-trip
+            content = dump_json(load_json(content))
+        replace_file(path=cache_file, content=content)
+
+        if etag is not None:
+            replace_file(path=etag_file, content=etag.encode('utf-8'))
+    except (OSError, ValueError) as e:
+        _LOGGER.error('Failed to write %s: %s', cache_file, e)
+
+
+def replace_file(path: str, content: bytes):
+    temp_path = f'{path}.tmp'
+    Path(temp_path).write_bytes(content)
+    os.replace(temp_path, path)
+
+
+def load_json(data: bytes):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def read_json(path: str):
+    with open(path, 'rb') as f:
+        if orjson is None:
+            return json.loads(f.read())
+
+        # orjson parses straight from the mapped pages without a copy
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as data:
+                return orjson.loads(data)
 
-def parse_actions(actions: [dict], start_datetime: datetime) -> [Spent]:
-    print(f'Start period: {start_datetime}')
 
-    pattern = re.compile(_PLUS_FOR_TRELLO_COMMENT_FORMAT)
+def dump_json(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(
+            obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def parse_datetime(datetime_str: str) -> datetime:
+    # fromisoformat() before Python 3.11 does not accept the 'Z' suffix
+    if datetime_str.endswith('Z'):
+        datetime_str = f'{datetime_str[:-1]}+00:00'
+    return datetime.fromisoformat(datetime_str)
+
+
+def parse_actions(actions: [dict], start_datetime: datetime) -> [Spent]:
+    _LOGGER.debug('Start period: %s', start_datetime)
 
     in_period_actions = []
     for action in actions:
         action_datetime_str = action['date']
-        action_datetime = datetime.strptime(
-            action_datetime_str, '%Y-%m-%dT%H:%M:%S.%f%z')
-        print(action_datetime)
+        action_datetime = parse_datetime(action_datetime_str)
+        _LOGGER.debug('Action datetime: %s', action_datetime)
 
+        # Trello returns actions newest first, so the rest are older too
         if (action_datetime < start_datetime):
-            continue
+            break
 
         text = action['data']['text']
-        matched = pattern.match(text)
+        if not text.startswith(_PLUS_FOR_TRELLO_COMMENT_PREFIX):
+            continue
+
+        matched = _PLUS_FOR_TRELLO_COMMENT_PATTERN.match(text)
         if not matched:
             continue
 
@@ -379,21 +481,18 @@ def parse_actions(actions: [dict], start_datetime: datetime) -> [Spent]:
 
         action = Action(card_id=card_id, comment=comment, spent=spent)
 
-        print(action)
+        _LOGGER.debug('Action: %s', action)
 
         in_period_actions.append(action)
 
-    print(f'Filtered actions: #{len(in_period_actions)}')
+    _LOGGER.info('Filtered actions: #%d', len(in_period_actions))
 
-    duplicated_card_id_list = [action.card_id for action in in_period_actions]
-    card_id_set = set(duplicated_card_id_list)
+    card_actions_by_card_id = defaultdict(list)
+    for action in in_period_actions:
+        card_actions_by_card_id[action.card_id].append(action)
 
     spents = []
-    for card_id in card_id_set:
-        card_actions = [
-            action
-            for action in in_period_actions
-            if action.card_id == card_id]
+    for card_id, card_actions in card_actions_by_card_id.items():
         card_spent_raw = sum([action.spent for action in card_actions])
         card_spent = round(card_spent_raw, 2)
         card_comments = [
@@ -404,42 +503,35 @@ def parse_actions(actions: [dict], start_datetime: datetime) -> [Spent]:
             spent=card_spent)
         spents.append(spent)
 
-    print(spents)
+    _LOGGER.debug('Spents: %s', spents)
 
     return spents
 
 
-def fetch_cards(board_id: str, general_params: dict) -> [dict]:
+def fetch_cards(board_id: str) -> [dict]:
     target_status = 'visible'
     get_actions_path = f'/1/boards/{board_id}/cards/{target_status}'
 
-    query = get_query(params=general_params)
-
-    url = f'{_API_ORIGIN}{get_actions_path}?{query}'
+    url = f'{_API_ORIGIN}{get_actions_path}'
 
-    print(f'Get url: {url}')
-
-    result = requests.get(url)
-    cards_string = result.text
-
-    print(f'result: {cards_string}')
-
-    cards = json.loads(cards_string)
+    content = fetch_content(
+        url=url, params={}, cache_file=_MOCK_CARDS_FILE)
+    cards = load_json(content)
     return cards
 
 
 def parse_cards(cards: [{}]) -> {str: Card}:
-    parsed_cards = {}
-    for card in cards:
-        labels = [
-            Label(id=label['id'], text=label['name'])
-            for label in card['labels']
-        ]
-        card_id = card['id']
-        parsed_cards[card_id] = Card(
-            id=card_id, title=card['name'], labels=labels)
-
-    print(parsed_cards)
+    parsed_cards = {
+        card['id']: Card(
+            id=card['id'],
+            title=card['name'],
+            labels=frozenset(
+                Label(id=label['id'], text=label['name'])
+                for label in card['labels']))
+        for card in cards
+    }
+
+    _LOGGER.debug('Parsed cards: %s', parsed_cards)
 
     return parsed_cards
 
@@ -448,9 +540,13 @@ def get_project_report(
         project: str,
         spents: [Spent],
         categories: [str],
-        cards: [Card]) -> ProjectReport:
+        cards: [Card],
+        card_ids_by_label_id: {str: {str}}) -> ProjectReport:
     category_reports = get_category_reports(
-        spents=spents, categories=categories, cards=cards)
+        spents=spents,
+        categories=categories,
+        cards=cards,
+        card_ids_by_label_id=card_ids_by_label_id)
 
     project_spent = sum([report.spent for report in category_reports])
     return ProjectReport(
@@ -460,17 +556,19 @@ def get_project_report(
 
 
 def get_category_reports(
-        spents: [Spent], categories: [str], cards: [Card]) -> [CategoryReport]:
+        spents: [Spent],
+        categories: [str],
+        cards: [Card],
+        card_ids_by_label_id: {str: {str}}) -> [CategoryReport]:
     category_reports = []
     added_card_ids = set()
 
     for category in categories:
-        category_card_id_set = [
-            card.id for card in cards.values() if category in card.labels]
+        category_card_ids = card_ids_by_label_id[category.id]
         category_spents = [
             spent
             for spent in spents
-            if spent.card_id in category_card_id_set]
+            if spent.card_id in category_card_ids]
 
         if len(category_spents) == 0:
             continue
@@ -530,26 +628,27 @@ def get_category_reports(
 
 
 def get_markdown(report: DailyReport) -> str:
-    markdown = (
-        f'# {report.title}\n'
-        f'稼働時間: {report.spent:.2f}h\n'
-        '\n')
+    lines = [
+        f'# {report.title}\n',
+        f'稼働時間: {report.spent:.2f}h\n',
+        '\n',
+    ]
 
     for project in report.projects:
-        markdown += f'## [{project.spent:.2f}h] {project.title}\n'
+        lines.append(f'## [{project.spent:.2f}h] {project.title}\n')
 
         for category in project.categories:
-            markdown += f'- [{category.spent:.2f}h] {category.title}\n'
+            lines.append(f'- [{category.spent:.2f}h] {category.title}\n')
 
             for task in category.tasks:
-                markdown += f'  - [{task.spent:.2f}h] {task.title}\n'
+                lines.append(f'  - [{task.spent:.2f}h] {task.title}\n')
 
                 for sub_task in task.sub_tasks:
-                    markdown += f'    - {sub_task}\n'
+                    lines.append(f'    - {sub_task}\n')
 
-        markdown += '\n'
+        lines.append('\n')
 
-    return markdown
+    return ''.join(lines)
 
 
 def get_dict(report: DailyReport) -> {}:
@@ -576,8 +675,8 @@ def get_dict(report: DailyReport) -> {}:
             for task in category.tasks:
                 task_dict = {
                     'title': task.title,
-                    'spent': f'task.spent',
-                    'sub_tasks': [sub_task for sub_task in task.sub_tasks],
+                    'spent': task.spent,
+                    'sub_tasks': task.sub_tasks,
                 }
 
                 category_dict['tasks'].append(task_dict)